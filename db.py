@@ -0,0 +1,53 @@
+import logging
+from functools import lru_cache
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+
+class Settings(BaseSettings):
+    DBUSER: str
+    DBPASS: str
+    DBHOST: str
+    DBNAME: str
+    # SQL logging costs string formatting per statement, so it is opt-in:
+    # set SQL_ECHO=1 to get full statement + result logging while debugging
+    SQL_ECHO: bool = False
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    @property
+    def database_uri(self) -> str:
+        uri = f"postgresql://{self.DBUSER}:{self.DBPASS}@{self.DBHOST}/{self.DBNAME}"
+        if self.DBHOST != "localhost":
+            uri += "?sslmode=require"
+        return uri
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+
+settings = get_settings()
+
+if not settings.SQL_ECHO:
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
+# One engine (and so one connection pool and statement cache) shared by
+# the API and the seeding script
+engine = create_engine(
+    settings.database_uri,
+    executemany_mode="values_plus_batch",
+    executemany_batch_page_size=500,
+    insertmanyvalues_page_size=1000,
+    pool_size=20,
+    max_overflow=10,
+    pool_pre_ping=True,
+    echo="debug" if settings.SQL_ECHO else False,
+)
+
+# Session factory shared by all requests; expire_on_commit=False keeps
+# returned objects usable after commit without a refresh SELECT
+SessionLocal = sessionmaker(engine, expire_on_commit=False, class_=Session)
@@ -1,42 +1,29 @@
-import os
 from datetime import date, datetime, timedelta
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, func
+
+from db import engine
 
 # Import your models from main.py
 from main import Base, User, Book, Checkout
 
-# Load environment variables
-load_dotenv(".env")
-DBUSER = os.environ["DBUSER"]
-DBPASS = os.environ["DBPASS"]
-DBHOST = os.environ["DBHOST"]
-DBNAME = os.environ["DBNAME"]
-DATABASE_URI = f"postgresql://{DBUSER}:{DBPASS}@{DBHOST}/{DBNAME}"
-if DBHOST != "localhost":
-    DATABASE_URI += "?sslmode=require"
-
-engine = create_engine(DATABASE_URI, echo=True)
-
 def init_database():
     """Initialize the database with sample data"""
-    
+
     # Create all tables
     Base.metadata.create_all(engine)
-    
-    with Session(engine) as session:
+
+    with engine.begin() as conn:
         # Check if data already exists
-        existing_users = session.query(User).count()
+        existing_users = conn.execute(select(func.count()).select_from(User)).scalar()
         if existing_users > 0:
             print("Database already contains data. Skipping initialization.")
             return
-        
+
         print("Initializing database with sample data...")
-        
+
         # Create sample users
         users = [
-            User(
+            dict(
                 user_id=987654,
                 name="Nathan Cayden",
                 email="nathan@example.com",
@@ -45,7 +32,7 @@ def init_database():
                 address="5432 Street",
                 phone_number="5555555555"
             ),
-            User(
+            dict(
                 user_id=123456,
                 name="Austin Finnagan",
                 email="austin@example.com",
@@ -54,7 +41,7 @@ def init_database():
                 address="1234 Avenue",
                 phone_number="5551234567"
             ),
-            User(
+            dict(
                 user_id=555555,
                 name="Jeharya Vallerija",
                 email="jeharya@example.com",
@@ -63,7 +50,7 @@ def init_database():
                 address="9876 Boulevard",
                 phone_number="5559876543"
             ),
-            User(
+            dict(
                 user_id=111111,
                 name="Madisyn Roope",
                 email="madisyn@example.com",
@@ -73,10 +60,10 @@ def init_database():
                 phone_number="5557778888"
             )
         ]
-        
+
         # Create sample books
         books = [
-            Book(
+            dict(
                 isbn=9780743273565,
                 title="The Great Gatsby",
                 author="F. Scott Fitzgerald",
@@ -87,7 +74,7 @@ def init_database():
                 location="3rd Floor, A-12",
                 is_available=False  # Checked out by Morten
             ),
-            Book(
+            dict(
                 isbn=9780452284234,
                 title="To Kill a Mockingbird",
                 author="Harper Lee",
@@ -98,7 +85,7 @@ def init_database():
                 location="3rd Floor, B-7",
                 is_available=False  # Checked out by Morten
             ),
-            Book(
+            dict(
                 isbn=9780061120084,
                 title="Brave New World",
                 author="Aldous Huxley",
@@ -109,7 +96,7 @@ def init_database():
                 location="2nd Floor, C-3",
                 is_available=False  # Checked out by Morten
             ),
-            Book(
+            dict(
                 isbn=9780140449136,
                 title="The Odyssey",
                 author="Homer",
@@ -120,7 +107,7 @@ def init_database():
                 location="4th Floor, D-1",
                 is_available=True
             ),
-            Book(
+            dict(
                 isbn=9780553213119,
                 title="Moby Dick",
                 author="Herman Melville",
@@ -131,7 +118,7 @@ def init_database():
                 location="3rd Floor, A-15",
                 is_available=True
             ),
-            Book(
+            dict(
                 isbn=9780316769174,
                 title="The Catcher in the Rye",
                 author="J.D. Salinger",
@@ -142,7 +129,7 @@ def init_database():
                 location="3rd Floor, B-3",
                 is_available=False  # Checked out by Jane
             ),
-            Book(
+            dict(
                 isbn=9780451524935,
                 title="1984",
                 author="George Orwell",
@@ -153,7 +140,7 @@ def init_database():
                 location="2nd Floor, D-8",
                 is_available=True
             ),
-            Book(
+            dict(
                 isbn=9780142437247,
                 title="Don Quixote",
                 author="Miguel de Cervantes",
@@ -165,43 +152,42 @@ def init_database():
                 is_available=True
             )
         ]
-        
-        # Add users and books to session
-        session.add_all(users)
-        session.add_all(books)
-        session.commit()
-        
+
         # Create sample checkouts
         now = datetime.now()
         checkouts = [
             # Morten's checkouts (matching your example)
-            Checkout(
+            dict(
                 user_id=987654,
                 isbn=9780743273565,
                 checkout_date=now - timedelta(days=11),
-                due_date=now + timedelta(days=19)
+                due_date=now + timedelta(days=19),
+                return_date=None
             ),
-            Checkout(
+            dict(
                 user_id=987654,
                 isbn=9780452284234,
                 checkout_date=now - timedelta(days=6),
-                due_date=now + timedelta(days=24)
+                due_date=now + timedelta(days=24),
+                return_date=None
             ),
-            Checkout(
+            dict(
                 user_id=987654,
                 isbn=9780061120084,
                 checkout_date=now - timedelta(days=4),
-                due_date=now + timedelta(days=26)
+                due_date=now + timedelta(days=26),
+                return_date=None
             ),
             # Jane has one book checked out
-            Checkout(
+            dict(
                 user_id=123456,
                 isbn=9780316769174,
                 checkout_date=now - timedelta(days=20),
-                due_date=now - timedelta(days=5)  # Overdue!
+                due_date=now - timedelta(days=5),  # Overdue!
+                return_date=None
             ),
             # Bob returned a book (historical record)
-            Checkout(
+            dict(
                 user_id=555555,
                 isbn=9780451524935,
                 checkout_date=now - timedelta(days=40),
@@ -209,10 +195,14 @@ def init_database():
                 return_date=now - timedelta(days=12)  # Returned on time
             )
         ]
-        
-        session.add_all(checkouts)
-        session.commit()
-        
+
+        # One executemany per table - psycopg2's insertmanyvalues fast path
+        # turns each into a single multi-values INSERT instead of one
+        # round-trip per row
+        conn.execute(insert(User), users)
+        conn.execute(insert(Book), books)
+        conn.execute(insert(Checkout), checkouts)
+
         print("Database initialized successfully!")
         print(f"Added {len(users)} users")
         print(f"Added {len(books)} books")
@@ -220,4 +210,4 @@ def init_database():
 
 
 if __name__ == "__main__":
-    init_database()
\ No newline at end of file
+    init_database()
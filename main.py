@@ -1,10 +1,12 @@
 import os
+from decimal import Decimal
 from typing import List, Optional
-from datetime import date, datetime, timedelta
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from datetime import date, datetime
+import orjson
+from fastapi import FastAPI, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict
 
-from dotenv import load_dotenv
 from sqlalchemy import (
     String,
     Column,
@@ -15,11 +17,36 @@ from sqlalchemy import (
     Boolean,
     Numeric,
     ForeignKey,
+    select,
+    insert,
+    update,
+    literal,
+    func,
+    Index,
+    text,
+    Identity,
+    bindparam,
 )
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, relationship, DeclarativeBase
-from sqlalchemy import create_engine
 
-app = FastAPI()
+from db import engine, SessionLocal
+
+class LibraryJSONResponse(ORJSONResponse):
+    """ORJSONResponse that also knows how to serialize Decimal columns."""
+
+    @staticmethod
+    def _default(obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        raise TypeError
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=self._default)
+
+
+app = FastAPI(default_response_class=LibraryJSONResponse)
 
 
 # Pydantic models for API responses
@@ -33,8 +60,7 @@ class BookResponse(BaseModel):
     genre: Optional[str] = None
     location: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, validate_assignment=False)
 
 
 class UserResponse(BaseModel):
@@ -47,8 +73,7 @@ class UserResponse(BaseModel):
     address: Optional[str] = None
     phoneNumber: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, validate_assignment=False)
 
 
 # Pydantic models for API input
@@ -100,21 +125,28 @@ class Base(DeclarativeBase):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_email", "email", unique=True),)
 
-    user_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, Identity(always=False, start=100000), primary_key=True)
     name = Column(String(255), nullable=False)
-    email = Column(String(255), unique=True, nullable=False)
+    email = Column(String(255), nullable=False)
     member_since = Column(Date, nullable=False, default=date.today)
     fine_balance = Column(Numeric(10, 2), default=0.00)
     address = Column(String(500))
     phone_number = Column(String(20))
 
-    # Relationship
-    checkouts = relationship("Checkout", back_populates="user")
+    # Relationship; lazy="raise" turns an accidental lazy load (a hidden
+    # per-row SELECT) into an error - eager-load with selectinload() where
+    # the collection is actually wanted
+    checkouts = relationship("Checkout", back_populates="user", lazy="raise")
 
 
 class Book(Base):
     __tablename__ = "books"
+    __table_args__ = (
+        # Partial index for "available books" listings
+        Index("ix_books_available", "isbn", postgresql_where=text("is_available")),
+    )
 
     isbn = Column(BigInteger, primary_key=True)
     title = Column(String(500), nullable=False)
@@ -127,38 +159,111 @@ class Book(Base):
     is_available = Column(Boolean, default=True)
 
     # Relationship
-    checkouts = relationship("Checkout", back_populates="book")
+    checkouts = relationship("Checkout", back_populates="book", lazy="raise")
 
 
 class Checkout(Base):
     __tablename__ = "checkouts"
+    __table_args__ = (
+        # Partial indexes covering the hot "active checkout" lookups;
+        # returned rows are excluded so the indexes stay small
+        Index(
+            "ix_checkouts_active_user",
+            "user_id",
+            postgresql_where=text("return_date IS NULL"),
+        ),
+        Index(
+            "ix_checkouts_active_isbn",
+            "isbn",
+            postgresql_where=text("return_date IS NULL"),
+        ),
+    )
 
     checkout_id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     isbn = Column(BigInteger, ForeignKey("books.isbn"), nullable=False)
     checkout_date = Column(DateTime, default=datetime.now)
-    due_date = Column(DateTime, nullable=False)
+    # Due dates are computed in Postgres: end of day, 30 days out
+    due_date = Column(
+        DateTime,
+        nullable=False,
+        server_default=text("(CURRENT_DATE + INTERVAL '30 days' + INTERVAL '23:59:59')"),
+    )
     return_date = Column(DateTime)
 
     # Relationships
-    user = relationship("User", back_populates="checkouts")
-    book = relationship("Book", back_populates="checkouts")
-
-
-# Connect to the database
-load_dotenv(".env")
-DBUSER = os.environ["DBUSER"]
-DBPASS = os.environ["DBPASS"]
-DBHOST = os.environ["DBHOST"]
-DBNAME = os.environ["DBNAME"]
-DATABASE_URI = f"postgresql://{DBUSER}:{DBPASS}@{DBHOST}/{DBNAME}"
-if DBHOST != "localhost":
-    DATABASE_URI += "?sslmode=require"
-
-engine = create_engine(DATABASE_URI, echo=True)
-
-# Create tables in database
-Base.metadata.create_all(engine)
+    user = relationship("User", back_populates="checkouts", lazy="raise")
+    book = relationship("Book", back_populates="checkouts", lazy="raise")
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def create_tables():
+    # Schema management belongs to init_db.py; opting in with
+    # AUTO_MIGRATE=1 keeps the DDL probes (one per table) off every
+    # worker boot and --reload cycle
+    if os.getenv("AUTO_MIGRATE") == "1":
+        Base.metadata.create_all(engine)
+
+
+# Statements built once at import and executed with bound parameters, so
+# every request hits SQLAlchemy's compiled-statement cache instead of
+# re-running the query builder
+GET_USER_STMT = (
+    select(
+        User,
+        # coalesce covers the filtered aggregate going NULL when every
+        # checkout has been returned; array_remove strips the NULL the
+        # outer join pads in for users with no checkouts at all
+        func.coalesce(
+            func.array_remove(
+                func.array_agg(Checkout.isbn).filter(Checkout.return_date.is_(None)),
+                None,
+            ),
+            text("'{}'::bigint[]"),
+        ),
+    )
+    .outerjoin(Checkout)
+    .where(User.user_id == bindparam("uid"))
+    .group_by(User.user_id)
+)
+USER_BY_EMAIL_STMT = select(User).where(User.email == bindparam("email"))
+ACTIVE_CHECKOUTS_COUNT_STMT = (
+    select(func.count())
+    .select_from(Checkout)
+    .where(Checkout.user_id == bindparam("uid"), Checkout.return_date.is_(None))
+)
+# Close out a checkout, free the book and apply any late fee in one
+# statement; days late are computed with Postgres date arithmetic and
+# the EXISTS guards make the book/user updates no-ops when there is no
+# active checkout
+RETURN_BOOK_STMT = text(
+    """
+    WITH ret AS (
+        UPDATE checkouts
+        SET return_date = now()
+        WHERE isbn = :isbn AND user_id = :uid AND return_date IS NULL
+        RETURNING due_date, now() - due_date AS late
+    ), bk AS (
+        UPDATE books
+        SET is_available = true
+        WHERE isbn = :isbn AND EXISTS (SELECT 1 FROM ret)
+    )
+    UPDATE users
+    SET fine_balance = fine_balance
+        + GREATEST(EXTRACT(day FROM (SELECT late FROM ret)), 0) * 0.50
+    WHERE user_id = :uid AND EXISTS (SELECT 1 FROM ret)
+    RETURNING fine_balance,
+        GREATEST(EXTRACT(day FROM (SELECT late FROM ret)), 0) * 0.50 AS late_fee
+    """
+)
 
 
 @app.get("/")
@@ -167,90 +272,82 @@ def root():
 
 
 @app.get("/users/{user_id}", response_model=UserResponse)
-def get_user(user_id: int):
-    with Session(engine) as session:
-        # Get user
-        user = session.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Get checked out books (books that haven't been returned)
-        checked_out = (
-            session.query(Checkout.isbn)
-            .filter(Checkout.user_id == user_id, Checkout.return_date.is_(None))
-            .all()
-        )
-
-        checked_out_isbns = [checkout.isbn for checkout in checked_out]
-
-        return UserResponse(
-            userId=user.user_id,
-            name=user.name,
-            email=user.email,
-            memberSince=user.member_since,
-            checkedOutBooks=checked_out_isbns,
-            fineBalance=float(user.fine_balance),
-            address=user.address,
-            phoneNumber=user.phone_number,
-        )
+def get_user(user_id: int, session: Session = Depends(get_db)):
+    # Fetch the user and their active checkout ISBNs in one query; the
+    # aggregation runs in Postgres and the outer join keeps users with no
+    # checkouts
+    row = session.execute(GET_USER_STMT, {"uid": user_id}).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    user, checked_out_isbns = row
+
+    # model_construct skips field validation - the values come straight
+    # from the typed DB schema
+    return UserResponse.model_construct(
+        userId=user.user_id,
+        name=user.name,
+        email=user.email,
+        memberSince=user.member_since,
+        checkedOutBooks=checked_out_isbns,
+        # Pydantic serializes the response_model before the response class
+        # runs, so the Decimal must be coerced here - left alone it gets
+        # stringified against the float field
+        fineBalance=float(user.fine_balance),
+        address=user.address,
+        phoneNumber=user.phone_number,
+    )
 
 
 @app.get("/books/{isbn}", response_model=BookResponse)
-def get_book(isbn: int):
-    with Session(engine) as session:
-        book = session.query(Book).filter(Book.isbn == isbn).first()
-        if not book:
-            raise HTTPException(status_code=404, detail="Book not found")
-
-        return BookResponse(
-            isbn=book.isbn,
-            title=book.title,
-            author=book.author,
-            publisher=book.publisher,
-            year=book.year,
-            pages=book.pages,
-            genre=book.genre,
-            location=book.location,
-        )
+def get_book(isbn: int, session: Session = Depends(get_db)):
+    book = session.get(Book, isbn)
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    return BookResponse.model_construct(
+        isbn=book.isbn,
+        title=book.title,
+        author=book.author,
+        publisher=book.publisher,
+        year=book.year,
+        pages=book.pages,
+        genre=book.genre,
+        location=book.location,
+    )
 
 
 @app.post("/users")
-def create_user(user: UserIn):
-    with Session(engine) as session:
-        # Check if email already exists
-        existing = session.query(User).filter(User.email == user.email).first()
-        if existing:
-            raise HTTPException(status_code=400, detail="Email already registered")
-
-        # Get next user_id (you might want to use autoincrement instead)
-        max_id = session.query(User.user_id).order_by(User.user_id.desc()).first()
-        next_id = (max_id[0] + 1) if max_id else 100000
-
-        new_user = User(
-            user_id=next_id,
+def create_user(user: UserIn, session: Session = Depends(get_db)):
+    # Fuse the uniqueness check and the insert: ON CONFLICT DO NOTHING on
+    # the email index makes the duplicate case a no-op in the same
+    # round-trip, with no SELECT-then-INSERT race window
+    stmt = (
+        pg_insert(User)
+        .values(
             name=user.name,
             email=user.email,
             address=user.address,
             phone_number=user.phoneNumber,
             member_since=date.today(),
         )
-        session.add(new_user)
-        session.commit()
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User.user_id)
+    )
+    new_id = session.execute(stmt).scalar_one_or_none()
+    session.commit()
 
-        return {"message": f"User created with ID {new_user.user_id}"}
+    if new_id is None:
+        raise HTTPException(status_code=400, detail="Email already registered")
 
+    return {"message": f"User created with ID {new_id}"}
 
-@app.post("/books")
-def create_book(book: BookIn):
-    with Session(engine) as session:
-        # Check if ISBN already exists
-        existing = session.query(Book).filter(Book.isbn == book.isbn).first()
-        if existing:
-            raise HTTPException(
-                status_code=400, detail="Book with this ISBN already exists"
-            )
 
-        new_book = Book(
+@app.post("/books")
+def create_book(book: BookIn, session: Session = Depends(get_db)):
+    stmt = (
+        pg_insert(Book)
+        .values(
             isbn=book.isbn,
             title=book.title,
             author=book.author,
@@ -260,262 +357,260 @@ def create_book(book: BookIn):
             genre=book.genre,
             location=book.location,
         )
-        session.add(new_book)
-        session.commit()
+        .on_conflict_do_nothing(index_elements=[Book.isbn])
+        .returning(Book.isbn)
+    )
+    created = session.execute(stmt).scalar_one_or_none()
+    session.commit()
+
+    if created is None:
+        raise HTTPException(
+            status_code=400, detail="Book with this ISBN already exists"
+        )
 
-        return {"message": f"Book '{book.title}' added to library"}
+    return {"message": f"Book '{book.title}' added to library"}
 
 
 @app.post("/checkout")
-def checkout_book(checkout: CheckoutIn):
-    with Session(engine) as session:
-        # Check if user exists
-        user = session.query(User).filter(User.user_id == checkout.userId).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Check if book exists and is available
-        book = session.query(Book).filter(Book.isbn == checkout.isbn).first()
-        if not book:
-            raise HTTPException(status_code=404, detail="Book not found")
-        if not book.is_available:
-            raise HTTPException(status_code=400, detail="Book is not available")
-
-        # Create checkout record
-        due_date = datetime.now().replace(hour=23, minute=59, second=59) + timedelta(
-            days=30
+def checkout_book(checkout: CheckoutIn, session: Session = Depends(get_db)):
+    # Flip availability and record the checkout atomically in one statement:
+    # the UPDATE only matches an available copy, and the INSERT only fires
+    # when the UPDATE returned a row. A bad user_id surfaces as an FK
+    # violation instead of a preliminary SELECT.
+    upd = (
+        update(Book)
+        .where(Book.isbn == checkout.isbn, Book.is_available.is_(True))
+        .values(is_available=False)
+        .returning(Book.isbn, Book.title)
+        .cte("upd")
+    )
+    # due_date is filled in by its server default and read back via
+    # RETURNING, so Python never computes or ships a timestamp
+    ins = (
+        insert(Checkout)
+        .from_select(
+            ["user_id", "isbn", "checkout_date"],
+            select(
+                literal(checkout.userId),
+                upd.c.isbn,
+                literal(datetime.now()),
+            ),
         )
-        new_checkout = Checkout(
-            user_id=checkout.userId, isbn=checkout.isbn, due_date=due_date
-        )
-
-        # Mark book as unavailable
-        book.is_available = False
-
-        session.add(new_checkout)
+        .returning(Checkout.due_date)
+        .cte("ins")
+    )
+
+    try:
+        # Both CTEs return at most one row; the literal-True join just
+        # keeps SQLAlchemy from flagging a cartesian product
+        row = session.execute(
+            select(upd.c.title, ins.c.due_date).join_from(upd, ins, literal(True))
+        ).first()
         session.commit()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if not row:
+        raise HTTPException(status_code=400, detail="Book is not available")
 
-        return {
-            "message": f"Book '{book.title}' checked out to {user.name}",
-            "dueDate": due_date,
-        }
+    return {
+        "message": f"Book '{row.title}' checked out to user {checkout.userId}",
+        "dueDate": row.due_date,
+    }
 
 
 @app.post("/return/{isbn}")
-def return_book(isbn: int, user_id: int):
-    with Session(engine) as session:
-        # Find the checkout record
-        checkout = (
-            session.query(Checkout)
-            .filter(
-                Checkout.isbn == isbn,
-                Checkout.user_id == user_id,
-                Checkout.return_date.is_(None),
-            )
-            .first()
+def return_book(isbn: int, user_id: int, session: Session = Depends(get_db)):
+    row = session.execute(
+        RETURN_BOOK_STMT, {"isbn": isbn, "uid": user_id}
+    ).first()
+    session.commit()
+
+    if not row:
+        raise HTTPException(
+            status_code=404,
+            detail="No active checkout found for this book and user",
         )
 
-        if not checkout:
-            raise HTTPException(
-                status_code=404,
-                detail="No active checkout found for this book and user",
-            )
+    late_fee = float(row.late_fee)
+    if late_fee > 0:
+        return {"message": f"Book returned. Late fee of ${late_fee:.2f} applied."}
 
-        # Mark as returned
-        checkout.return_date = datetime.now()
-
-        # Mark book as available
-        book = session.query(Book).filter(Book.isbn == isbn).first()
-        book.is_available = True
-
-        # Calculate any late fees (optional)
-        if checkout.return_date > checkout.due_date:
-            days_late = (checkout.return_date - checkout.due_date).days
-            late_fee = days_late * 0.50  # 50 cents per day
-            user = session.query(User).filter(User.user_id == user_id).first()
-            user.fine_balance += late_fee
-
-            session.commit()
-            return {"message": f"Book returned. Late fee of ${late_fee:.2f} applied."}
-
-        session.commit()
-        return {"message": "Book returned successfully"}
+    return {"message": "Book returned successfully"}
 
 
 @app.get("/users")
 def get_all_users():
-    with Session(engine) as session:
-        users = session.query(User).all()
-        return [{"userId": u.user_id, "name": u.name, "email": u.email} for u in users]
+    # Core rows via .mappings() serialize directly - no ORM hydration or
+    # per-row identity-map bookkeeping on the list path
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(User.user_id.label("userId"), User.name, User.email)
+        ).mappings().all()
+    return list(rows)
 
 
 @app.get("/books")
 def get_all_books():
-    with Session(engine) as session:
-        books = session.query(Book).all()
-        return [
-            {
-                "isbn": b.isbn,
-                "title": b.title,
-                "author": b.author,
-                "available": b.is_available,
-            }
-            for b in books
-        ]
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(
+                Book.isbn,
+                Book.title,
+                Book.author,
+                Book.is_available.label("available"),
+            )
+        ).mappings().all()
+    return list(rows)
 
 
 # PUT methods - Full resource updates
 @app.put("/users/{user_id}")
-def update_user(user_id: int, user: UserIn):
-    with Session(engine) as session:
-        existing_user = session.query(User).filter(User.user_id == user_id).first()
-        if not existing_user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Check if email is being changed and if new email already exists
-        if user.email != existing_user.email:
-            email_exists = session.query(User).filter(User.email == user.email).first()
-            if email_exists:
-                raise HTTPException(status_code=400, detail="Email already registered")
-
-        # Update all fields
-        existing_user.name = user.name
-        existing_user.email = user.email
-        existing_user.address = user.address
-        existing_user.phone_number = user.phoneNumber
+def update_user(user_id: int, user: UserIn, session: Session = Depends(get_db)):
+    existing_user = session.get(User, user_id)
+    if not existing_user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Check if email is being changed and if new email already exists
+    if user.email != existing_user.email:
+        email_exists = session.execute(
+            USER_BY_EMAIL_STMT, {"email": user.email}
+        ).scalar_one_or_none()
+        if email_exists:
+            raise HTTPException(status_code=400, detail="Email already registered")
 
-        session.commit()
-        return {"message": f"User {user_id} updated successfully"}
+    # Update all fields
+    existing_user.name = user.name
+    existing_user.email = user.email
+    existing_user.address = user.address
+    existing_user.phone_number = user.phoneNumber
+
+    session.commit()
+    return {"message": f"User {user_id} updated successfully"}
 
 
 @app.put("/books/{isbn}")
-def update_book(isbn: int, book: BookIn):
-    with Session(engine) as session:
-        existing_book = session.query(Book).filter(Book.isbn == isbn).first()
-        if not existing_book:
-            raise HTTPException(status_code=404, detail="Book not found")
-
-        # Check if ISBN is being changed and if new ISBN already exists
-        if book.isbn != isbn:
-            isbn_exists = session.query(Book).filter(Book.isbn == book.isbn).first()
-            if isbn_exists:
-                raise HTTPException(
-                    status_code=400, detail="Book with this ISBN already exists"
-                )
-            existing_book.isbn = book.isbn
-
-        # Update all fields
-        existing_book.title = book.title
-        existing_book.author = book.author
-        existing_book.publisher = book.publisher
-        existing_book.year = book.year
-        existing_book.pages = book.pages
-        existing_book.genre = book.genre
-        existing_book.location = book.location
+def update_book(isbn: int, book: BookIn, session: Session = Depends(get_db)):
+    existing_book = session.get(Book, isbn)
+    if not existing_book:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    # Check if ISBN is being changed and if new ISBN already exists
+    if book.isbn != isbn:
+        isbn_exists = session.get(Book, book.isbn)
+        if isbn_exists:
+            raise HTTPException(
+                status_code=400, detail="Book with this ISBN already exists"
+            )
+        existing_book.isbn = book.isbn
 
-        session.commit()
-        return {"message": f"Book '{book.title}' updated successfully"}
+    # Update all fields
+    existing_book.title = book.title
+    existing_book.author = book.author
+    existing_book.publisher = book.publisher
+    existing_book.year = book.year
+    existing_book.pages = book.pages
+    existing_book.genre = book.genre
+    existing_book.location = book.location
+
+    session.commit()
+    return {"message": f"Book '{book.title}' updated successfully"}
 
 
 # PATCH methods - Partial resource updates
 @app.patch("/users/{user_id}")
-def patch_user(user_id: int, user_update: UserUpdate):
-    with Session(engine) as session:
-        existing_user = session.query(User).filter(User.user_id == user_id).first()
-        if not existing_user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Check if email is being changed and if new email already exists
-        if user_update.email and user_update.email != existing_user.email:
-            email_exists = (
-                session.query(User).filter(User.email == user_update.email).first()
-            )
-            if email_exists:
-                raise HTTPException(status_code=400, detail="Email already registered")
-
-        # Update only provided fields
-        if user_update.name is not None:
-            existing_user.name = user_update.name
-        if user_update.email is not None:
-            existing_user.email = user_update.email
-        if user_update.address is not None:
-            existing_user.address = user_update.address
-        if user_update.phoneNumber is not None:
-            existing_user.phone_number = user_update.phoneNumber
+def patch_user(user_id: int, user_update: UserUpdate, session: Session = Depends(get_db)):
+    existing_user = session.get(User, user_id)
+    if not existing_user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Check if email is being changed and if new email already exists
+    if user_update.email and user_update.email != existing_user.email:
+        email_exists = session.execute(
+            USER_BY_EMAIL_STMT, {"email": user_update.email}
+        ).scalar_one_or_none()
+        if email_exists:
+            raise HTTPException(status_code=400, detail="Email already registered")
 
-        session.commit()
-        return {"message": f"User {user_id} updated successfully"}
+    # Update only provided fields
+    if user_update.name is not None:
+        existing_user.name = user_update.name
+    if user_update.email is not None:
+        existing_user.email = user_update.email
+    if user_update.address is not None:
+        existing_user.address = user_update.address
+    if user_update.phoneNumber is not None:
+        existing_user.phone_number = user_update.phoneNumber
 
+    session.commit()
+    return {"message": f"User {user_id} updated successfully"}
 
-@app.patch("/books/{isbn}")
-def patch_book(isbn: int, book_update: BookUpdate):
-    with Session(engine) as session:
-        existing_book = session.query(Book).filter(Book.isbn == isbn).first()
-        if not existing_book:
-            raise HTTPException(status_code=404, detail="Book not found")
-
-        # Update only provided fields
-        if book_update.title is not None:
-            existing_book.title = book_update.title
-        if book_update.author is not None:
-            existing_book.author = book_update.author
-        if book_update.publisher is not None:
-            existing_book.publisher = book_update.publisher
-        if book_update.year is not None:
-            existing_book.year = book_update.year
-        if book_update.pages is not None:
-            existing_book.pages = book_update.pages
-        if book_update.genre is not None:
-            existing_book.genre = book_update.genre
-        if book_update.location is not None:
-            existing_book.location = book_update.location
 
-        session.commit()
-        return {"message": f"Book '{existing_book.title}' updated successfully"}
+@app.patch("/books/{isbn}")
+def patch_book(isbn: int, book_update: BookUpdate, session: Session = Depends(get_db)):
+    existing_book = session.get(Book, isbn)
+    if not existing_book:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    # Update only provided fields
+    if book_update.title is not None:
+        existing_book.title = book_update.title
+    if book_update.author is not None:
+        existing_book.author = book_update.author
+    if book_update.publisher is not None:
+        existing_book.publisher = book_update.publisher
+    if book_update.year is not None:
+        existing_book.year = book_update.year
+    if book_update.pages is not None:
+        existing_book.pages = book_update.pages
+    if book_update.genre is not None:
+        existing_book.genre = book_update.genre
+    if book_update.location is not None:
+        existing_book.location = book_update.location
+
+    session.commit()
+    return {"message": f"Book '{existing_book.title}' updated successfully"}
 
 
 # DELETE methods
 @app.delete("/users/{user_id}")
-def delete_user(user_id: int):
-    with Session(engine) as session:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Check if user has active checkouts
-        active_checkouts = (
-            session.query(Checkout)
-            .filter(Checkout.user_id == user_id, Checkout.return_date.is_(None))
-            .count()
+def delete_user(user_id: int, session: Session = Depends(get_db)):
+    user = session.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Check if user has active checkouts
+    active_checkouts = session.execute(
+        ACTIVE_CHECKOUTS_COUNT_STMT, {"uid": user_id}
+    ).scalar()
+
+    if active_checkouts > 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot delete user with active book checkouts. Please return all books first.",
         )
 
-        if active_checkouts > 0:
-            raise HTTPException(
-                status_code=400,
-                detail="Cannot delete user with active book checkouts. Please return all books first.",
-            )
-
-        # Delete the user (this will cascade to checkout history if needed)
-        session.delete(user)
-        session.commit()
-        return {"message": f"User {user_id} deleted successfully"}
+    # Delete the user (this will cascade to checkout history if needed)
+    session.delete(user)
+    session.commit()
+    return {"message": f"User {user_id} deleted successfully"}
 
 
 @app.delete("/books/{isbn}")
-def delete_book(isbn: int):
-    with Session(engine) as session:
-        book = session.query(Book).filter(Book.isbn == isbn).first()
-        if not book:
-            raise HTTPException(status_code=404, detail="Book not found")
-
-        # Check if book is currently checked out
-        if not book.is_available:
-            raise HTTPException(
-                status_code=400,
-                detail="Cannot delete book that is currently checked out",
-            )
+def delete_book(isbn: int, session: Session = Depends(get_db)):
+    book = session.get(Book, isbn)
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    # Check if book is currently checked out
+    if not book.is_available:
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot delete book that is currently checked out",
+        )
 
-        # Delete the book (this will cascade to checkout history if needed)
-        session.delete(book)
-        session.commit()
-        return {"message": f"Book '{book.title}' deleted successfully"}
+    # Delete the book (this will cascade to checkout history if needed)
+    session.delete(book)
+    session.commit()
+    return {"message": f"Book '{book.title}' deleted successfully"}